@@ -6,16 +6,22 @@ monkey.patch_all()
 
 
 import os
+import gevent
+from gevent.lock import RLock, Semaphore
 import json
+import hashlib
+import orjson
 import time
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import logging
 import secrets
-import re
 from flask import Flask, request, render_template, jsonify, abort, redirect, url_for, session, flash
-from flask_socketio import SocketIO, emit, disconnect
+from flask_socketio import SocketIO, emit, disconnect, join_room
 from datetime import datetime, timedelta
 from functools import wraps
+from collections import OrderedDict
 from werkzeug.security import generate_password_hash, check_password_hash
 import redis
 
@@ -27,6 +33,7 @@ def spawn_heartbeat_once():
     if not heartbeat_started:
         app.logger.info("Spawning heartbeat background task")
         socketio.start_background_task(target=start_heartbeat_check)
+        socketio.start_background_task(target=refresh_timestamp_cache)
         heartbeat_started = True
 
 
@@ -60,7 +67,7 @@ app.config['SECRET_KEY'] = os.environ.get("SECRET_KEY", secrets.token_hex(32))
 # Improved SocketIO configuration with reconnection settings
 socketio = SocketIO(
     app, 
-    async_mode=None,  # Let Flask-SocketIO choose the best mode
+    async_mode='gevent',  # Match the monkey patching above and the gunicorn gevent worker
     cors_allowed_origins='*',
     ping_timeout=60,
     ping_interval=25,
@@ -77,6 +84,22 @@ CONNECTOR_API_KEY = os.environ.get("CONNECTOR_API_KEY")
 DEFAULT_TIMEOUT = int(os.environ.get("DEFAULT_TIMEOUT", 60))
 # Max consecutive heartbeat failures before considering disconnected
 MAX_HEARTBEAT_FAILURES = int(os.environ.get("MAX_HEARTBEAT_FAILURES", 3))
+# Seconds between heartbeat checks when the backend answers immediately
+HEARTBEAT_INTERVAL = int(os.environ.get("HEARTBEAT_INTERVAL", 30))
+# Seconds the backend may hold a heartbeat long-poll open waiting for a state change
+HEARTBEAT_LONG_POLL_WAIT = int(os.environ.get("HEARTBEAT_LONG_POLL_WAIT", 25))
+# Seconds /heartbeat may reuse the last known IBKR status before asking the backend again
+IBKR_STATUS_TTL = float(os.environ.get("IBKR_STATUS_TTL", 0.25))
+
+# Shared HTTP session so backend requests (heartbeats in particular) reuse a
+# kept-alive connection instead of a new TCP+TLS handshake on every call
+backend_session = requests.Session()
+_backend_adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=Retry(total=0, read=False))
+backend_session.mount('https://', _backend_adapter)
+backend_session.mount('http://', _backend_adapter)
+backend_session.headers.update({'Connection': 'keep-alive'})
+if CONNECTOR_API_KEY:
+    backend_session.headers['X-API-KEY'] = CONNECTOR_API_KEY
 # Store the last connection parameters for potential auto-reconnect
 # last_connection_params = {}
 
@@ -89,6 +112,20 @@ connection_state = {
     "last_ibkr_status": None        # Last known IBKR connection status from backend
 }
 
+# Guards every connection_state write; readers that need several keys take a
+# dict(connection_state) snapshot under it so they never see a half-applied update
+state_lock = RLock()
+
+# Last backend reachability and IBKR status seen, and when (time.monotonic());
+# shared by /status, /heartbeat and heartbeat_check. ts is None until the first answer.
+ibkr_status_cache = {
+    "reachable": None,
+    "value": None,
+    "ts": None
+}
+# Held while backend_status() refreshes ibkr_status_cache, so only one refresh runs at a time
+ibkr_status_refresh = Semaphore()
+
 # Socket connection is tracked separately
 socket_state = {
     "connected": False,             # Current socket.io connection status
@@ -96,6 +133,27 @@ socket_state = {
     "clients": set()                # Set of connected socket client IDs
 }
 
+# Formatted "now" shared by the polled endpoints, refreshed once a second
+# so they don't format a fresh timestamp on every request
+timestamp_cache = {
+    "iso": datetime.now().isoformat()
+}
+
+def refresh_timestamp_cache():
+    """Background task keeping timestamp_cache current to the second"""
+    while True:
+        timestamp_cache["iso"] = datetime.now().isoformat()
+        socketio.sleep(1)
+
+# Authenticated dashboards join this room and receive connection_status broadcasts
+DASHBOARD_ROOM = 'dashboard'
+def emit_connection_status(payload):
+    """Broadcast a connection_status update to the dashboard room"""
+    socketio.emit('connection_status', payload, to=DASHBOARD_ROOM)
+
+# Password policy shared by add_user and change_password
+MIN_PASSWORD_LENGTH = 8
+
 # User database (replace with a real database in production)
 # In production, use a proper database like PostgreSQL, MySQL, or MongoDB
 users_db = {}
@@ -103,6 +161,48 @@ users_db = {}
 # Webhook URL paths with their tokens
 # Format: {"webhook_token": {"name": "Name", "created_at": "timestamp", "created_by": "username"}}
 webhook_tokens = {}
+# Immutable snapshot of webhook_tokens' keys for the webhook hot path; rebuilt by
+# refresh_webhook_token_set() whenever tokens are added or removed
+webhook_token_set = frozenset()
+
+def refresh_webhook_token_set():
+    """Rebuild webhook_token_set after webhook_tokens changes"""
+    global webhook_token_set
+    webhook_token_set = frozenset(webhook_tokens)
+
+def json_response(obj, status=200):
+    """orjson-encoded JSON response for frequently polled endpoints"""
+    return app.response_class(orjson.dumps(obj), status=status, mimetype='application/json')
+
+def verify_password(password_hash, password):
+    """Run the CPU-bound password hash check on gevent's threadpool so it doesn't stall other greenlets"""
+    return gevent.get_hub().threadpool.apply(check_password_hash, (password_hash, password))
+
+# Recently verified (username, password fingerprint, password hash) triples, so repeat
+# logins skip the pbkdf2 check. Fingerprints are keyed with a per-process secret and the
+# stored hash is part of the key, so a password change never matches an old entry.
+VERIFIED_LOGIN_CACHE_SIZE = 1024
+verified_logins = OrderedDict()
+_fingerprint_key = secrets.token_bytes(32)
+
+# Hash of a random password, checked for unknown usernames so they cost the same as real ones
+DUMMY_PASSWORD_HASH = generate_password_hash(secrets.token_hex(16))
+
+def check_login(username, password, password_hash):
+    """Check a user's password, answering from verified_logins when possible"""
+    if not password:
+        return False
+    fingerprint = hashlib.blake2b(password.encode(), key=_fingerprint_key, digest_size=16).digest()
+    cache_key = (username, fingerprint, password_hash)
+    if cache_key in verified_logins:
+        verified_logins.move_to_end(cache_key)
+        return True
+    if not verify_password(password_hash, password):
+        return False
+    verified_logins[cache_key] = True
+    if len(verified_logins) > VERIFIED_LOGIN_CACHE_SIZE:
+        verified_logins.popitem(last=False)
+    return True
 
 # Authentication decorator for routes that require login
 def login_required(f):
@@ -137,6 +237,7 @@ def initialize_admin_user():
             "created_at": datetime.now().isoformat(),
             "created_by": "system"
         }
+        refresh_webhook_token_set()
         
     # START HEARTBEAT LOOP ONCE AT FIRST REQUEST
     # app.logger.info("Spawning heartbeat background task")
@@ -156,10 +257,13 @@ def login():
         username = request.form.get('username')
         password = request.form.get('password')
         
-        if username in users_db and check_password_hash(users_db[username]['password_hash'], password):
+        user = users_db.get(username)
+        # Always run the hash check so response time doesn't reveal whether the user exists
+        password_hash = user['password_hash'] if user else DUMMY_PASSWORD_HASH
+        if check_login(username, password, password_hash) and user is not None:
             session.permanent = True  # Make session permanent for 24/7 operation
             session['user_id'] = username
-            session['is_admin'] = users_db[username].get('is_admin', False)
+            session['is_admin'] = user.get('is_admin', False)
             
             app.logger.info(f"User logged in: {username}")
             next_page = request.args.get('next', url_for('index'))
@@ -192,16 +296,17 @@ def change_password():
         username = session['user_id']
         
         # Verify current password
-        if not check_password_hash(users_db[username]['password_hash'], current_password):
+        if not check_login(username, current_password, users_db[username]['password_hash']):
             error = "Current password is incorrect"
         elif new_password != confirm_password:
             error = "New passwords do not match"
-        elif len(new_password) < 8:
-            error = "Password must be at least 8 characters long"
+        elif len(new_password or '') < MIN_PASSWORD_LENGTH:
+            error = f"Password must be at least {MIN_PASSWORD_LENGTH} characters long"
         else:
             # Update password
             users_db[username]['password_hash'] = generate_password_hash(new_password)
             users_db[username]['password_updated_at'] = datetime.now().isoformat()
+            verified_logins.clear()
             success = "Password changed successfully"
             app.logger.info(f"Password changed for user: {username}")
     
@@ -234,8 +339,8 @@ def add_user():
         
         if username in users_db:
             error = f"Username '{username}' already exists"
-        elif len(password) < 8:
-            error = "Password must be at least 8 characters long"
+        elif len(password or '') < MIN_PASSWORD_LENGTH:
+            error = f"Password must be at least {MIN_PASSWORD_LENGTH} characters long"
         else:
             users_db[username] = {
                 "password_hash": generate_password_hash(password),
@@ -306,6 +411,7 @@ def generate_webhook_token():
                 "created_at": datetime.now().isoformat(),
                 "created_by": session['user_id']
             }
+            refresh_webhook_token_set()
             webhook_url = request.host_url.rstrip('/') + f"/webhook/{new_token}"
             success = "Webhook token created successfully"
             app.logger.info(f"New webhook token created: {token_name} by {session['user_id']}")
@@ -322,6 +428,7 @@ def delete_webhook_token(token):
     if token in webhook_tokens:
         token_name = webhook_tokens[token]['name']
         del webhook_tokens[token]
+        refresh_webhook_token_set()
         flash(f"Webhook token '{token_name}' deleted successfully.", 'success')
         app.logger.info(f"Webhook token deleted: {token_name} by {session['user_id']}")
     else:
@@ -342,15 +449,12 @@ def index():
 
 # The functions below are from the original code with webhook modifications
 
-def send_backend_request(endpoint, method="POST", json_data=None, form_data=None, timeout=None):
+def send_backend_request(endpoint, method="POST", json_data=None, form_data=None, timeout=None, params=None):
     """Centralized function to handle backend requests with proper error handling"""
     if timeout is None:
         timeout = DEFAULT_TIMEOUT
     
     url = f"{CONNECTOR_URL}/{endpoint}"
-    headers = {}
-    if CONNECTOR_API_KEY:
-        headers['X-API-KEY'] = CONNECTOR_API_KEY
 
     app.logger.info(f"Sending {method} request to backend: {url}")
     
@@ -367,18 +471,21 @@ def send_backend_request(endpoint, method="POST", json_data=None, form_data=None
 
         if method.upper() == "POST":
             if json_data is not None:
-                response = requests.post(url, json=json_data, headers=headers, timeout=timeout)
+                response = backend_session.post(url, json=json_data, params=params, timeout=timeout)
             elif form_data is not None:
-                response = requests.post(url, data=form_data, headers=headers, timeout=timeout)
+                response = backend_session.post(url, data=form_data, params=params, timeout=timeout)
             else:
-                response = requests.post(url, headers=headers, timeout=timeout)
+                response = backend_session.post(url, params=params, timeout=timeout)
         else:
-            response = requests.get(url, headers=headers, timeout=timeout)
+            response = backend_session.get(url, params=params, timeout=timeout)
 
         response.raise_for_status()
         return response.json(), None
     
-    except requests.exceptions.Timeout:
+    except requests.exceptions.Timeout as e:
+        # timeout may be a (connect, read) tuple; report whichever side expired
+        if isinstance(timeout, tuple):
+            timeout = timeout[0] if isinstance(e, requests.exceptions.ConnectTimeout) else timeout[1]
         error_msg = f"Request to backend timed out after {timeout}s."
         app.logger.error(error_msg)
         return None, {"error": error_msg, "status_code": 504}
@@ -414,7 +521,7 @@ def connect_route():
     if missing_fields:
         error_msg = f"Missing required fields: {', '.join(missing_fields)}"
         app.logger.warning(f"Connection request missing fields: {error_msg}")
-        socketio.emit('connection_status', {
+        emit_connection_status({
             "success": False,
             "message": error_msg,
             "socket_connected": socket_state["connected"]
@@ -425,7 +532,7 @@ def connect_route():
     result, error = send_backend_request("connect", json_data=payload)
     if error:
         app.logger.error(f"IBKR connector rejected /connect: {error['error']}")
-        socketio.emit('connection_status', {
+        emit_connection_status({
             "success": False,
             "message": error["error"],
             "socket_connected": socket_state["connected"]
@@ -446,7 +553,7 @@ def connect_route():
 
 
     # 5) Tell the front-end it worked
-    socketio.emit('connection_status', {
+    emit_connection_status({
         "success": True,
         "message": result.get("message", "Connected successfully."),
         "socket_connected": socket_state["connected"]
@@ -456,22 +563,23 @@ def connect_route():
     
     # If successful, update connection state and start heartbeat
     if result and result.get('success'):
-        connection_state["ibkr_connected"] = True
-        connection_state["last_ibkr_status"] = True
-        connection_state["last_backend_heartbeat"] = datetime.now()
-        connection_state["heartbeat_failures"] = 0
-        connection_state["reconnect_in_progress"] = False
+        with state_lock:
+            connection_state["ibkr_connected"] = True
+            connection_state["last_ibkr_status"] = True
+            connection_state["last_backend_heartbeat"] = datetime.now()
+            connection_state["heartbeat_failures"] = 0
+            connection_state["reconnect_in_progress"] = False
         
         # Add socket_connected to the status
         result["socket_connected"] = socket_state["connected"]
-        socketio.emit('connection_status', result)
+        emit_connection_status(result)
         
         # Start the enhanced heartbeat check if not already running
         socketio.start_background_task(target=start_heartbeat_check)
     else:
         # Add socket_connected to the status
         result["socket_connected"] = socket_state["connected"]
-        socketio.emit('connection_status', result)
+        emit_connection_status(result)
     
     return jsonify(result)
 
@@ -484,7 +592,7 @@ def disconnect_route():
     result, error = send_backend_request("disconnect")
     
     if error:
-        socketio.emit('connection_status', {
+        emit_connection_status({
             "success": False, 
             "message": error['error'],
             "socket_connected": socket_state["connected"]
@@ -492,12 +600,13 @@ def disconnect_route():
         return jsonify({"success": False, "message": error['error']}), error['status_code']
     
     # Update connection state
-    connection_state["ibkr_connected"] = False
-    connection_state["last_ibkr_status"] = False
+    with state_lock:
+        connection_state["ibkr_connected"] = False
+        connection_state["last_ibkr_status"] = False
     
     # Add socket_connected to the status
     result["socket_connected"] = socket_state["connected"]
-    socketio.emit('connection_status', result)
+    emit_connection_status(result)
     
     return jsonify(result)
 
@@ -505,7 +614,7 @@ def disconnect_route():
 @app.route('/webhook/<token>', methods=['POST'])
 def webhook_receiver(token):
     # Validate the token
-    if token not in webhook_tokens:
+    if token not in webhook_token_set:
         app.logger.warning(f"Unauthorized webhook attempt with invalid token: {token}")
         return jsonify({"error": "Unauthorized. Invalid webhook token."}), 401
         
@@ -570,73 +679,91 @@ def status():
         })
     
     try:
-        result, error = send_backend_request("heartbeat", method="GET", timeout=5)
-        backend_status = "running" if not error else "unreachable"
+        # One (cached) backend heartbeat gives both reachability and the IBKR status
+        reachable, ibkr_status = backend_status()
         
-        # If backend is reachable, also get the IBKR status
-        ibkr_status = connection_state["ibkr_connected"]
-        if not error and backend_status == "running":
-            # Try to get the current IBKR status from backend
-            ibkr_result, ibkr_error = send_backend_request("heartbeat", method="GET", timeout=5)
-            if not ibkr_error and ibkr_result and "connected_to_ibkr" in ibkr_result:
-                ibkr_status = ibkr_result["connected_to_ibkr"]
-                # Update our state if it's different
-                if connection_state["ibkr_connected"] != ibkr_status:
-                    connection_state["ibkr_connected"] = ibkr_status
-                    connection_state["last_ibkr_status"] = ibkr_status
+        with state_lock:
+            state = dict(connection_state)
         
         return jsonify({
             "frontend": "running",
-            "backend": backend_status,
+            "backend": "running" if reachable else "unreachable",
             "backend_configured": True,
             "connected_to_ibkr": ibkr_status,
-            "last_heartbeat": connection_state["last_backend_heartbeat"].isoformat() if connection_state["last_backend_heartbeat"] else None,
-            "heartbeat_failures": connection_state["heartbeat_failures"],
-            "reconnect_in_progress": connection_state["reconnect_in_progress"],
+            "last_heartbeat": state["last_backend_heartbeat"].isoformat() if state["last_backend_heartbeat"] else None,
+            "heartbeat_failures": state["heartbeat_failures"],
+            "reconnect_in_progress": state["reconnect_in_progress"],
             "socket_connected": socket_state["connected"],
             "socket_clients": len(socket_state["clients"])
         })
     except Exception as e:
         app.logger.error(f"Status check error: {str(e)}")
+        with state_lock:
+            state = dict(connection_state)
         return jsonify({
             "frontend": "running",
             "backend": "error",
             "backend_configured": True,
-            "connected_to_ibkr": connection_state["ibkr_connected"],
-            "heartbeat_failures": connection_state["heartbeat_failures"],
+            "connected_to_ibkr": state["ibkr_connected"],
+            "heartbeat_failures": state["heartbeat_failures"],
             "error": str(e),
             "socket_connected": socket_state["connected"]
         })
 
+def refresh_backend_status():
+    """Ask the backend for its heartbeat and store the result in ibkr_status_cache"""
+    result, error = send_backend_request("heartbeat", method="GET", timeout=5)
+    if not error and result and "connected_to_ibkr" in result:
+        ibkr_connected = result["connected_to_ibkr"]
+        # Update our internal state if it's different
+        with state_lock:
+            if connection_state["ibkr_connected"] != ibkr_connected:
+                connection_state["ibkr_connected"] = ibkr_connected
+                connection_state["last_ibkr_status"] = ibkr_connected
+    ibkr_status_cache["reachable"] = not error
+    # Falls back to our internal state if we can't get it from the backend
+    ibkr_status_cache["value"] = connection_state["ibkr_connected"]
+    ibkr_status_cache["ts"] = time.monotonic()
+
+def backend_status(ttl=IBKR_STATUS_TTL):
+    """(backend reachable, IBKR connected), asking the backend at most once every `ttl` seconds"""
+    def is_fresh():
+        return ibkr_status_cache["ts"] is not None and time.monotonic() - ibkr_status_cache["ts"] <= ttl
+    
+    if is_fresh():
+        return ibkr_status_cache["reachable"], ibkr_status_cache["value"]
+    
+    # While a refresh is in flight other callers get the last value; before the
+    # first answer there is no last value, so they wait for it instead
+    if not ibkr_status_refresh.acquire(blocking=ibkr_status_cache["ts"] is None):
+        return ibkr_status_cache["reachable"], ibkr_status_cache["value"]
+    try:
+        # The cache may have been filled while we waited
+        if not is_fresh():
+            refresh_backend_status()
+    finally:
+        ibkr_status_refresh.release()
+    return ibkr_status_cache["reachable"], ibkr_status_cache["value"]
+
+def is_ibkr_connected(ttl=IBKR_STATUS_TTL):
+    """IBKR connection status, asking the backend at most once every `ttl` seconds"""
+    return backend_status(ttl)[1]
+
 # Enhanced heartbeat route to include IBKR status
 @app.route('/heartbeat', methods=['GET'])
 def heartbeat():
     """Enhanced endpoint to check server heartbeat and IBKR status"""
     try:
-        # Get IBKR connection status from backend if possible
-        result, error = send_backend_request("heartbeat", method="GET", timeout=5)
-        ibkr_connected = False
-        
-        if not error and result and "connected_to_ibkr" in result:
-            ibkr_connected = result["connected_to_ibkr"]
-            # Update our internal state if it's different
-            if connection_state["ibkr_connected"] != ibkr_connected:
-                connection_state["ibkr_connected"] = ibkr_connected
-                connection_state["last_ibkr_status"] = ibkr_connected
-        else:
-            # Use our internal state if we can't get from backend
-            ibkr_connected = connection_state["ibkr_connected"]
-        
-        return jsonify({
-            "status": "alive", 
-            "timestamp": datetime.now().isoformat(),
-            "connected_to_ibkr": ibkr_connected
+        return json_response({
+            "status": "alive",
+            "timestamp": timestamp_cache["iso"],
+            "connected_to_ibkr": is_ibkr_connected()
         })
     except Exception as e:
         app.logger.error(f"Heartbeat error: {str(e)}")
-        return jsonify({
+        return json_response({
             "status": "error",
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": timestamp_cache["iso"],
             "connected_to_ibkr": connection_state["ibkr_connected"],
             "error": str(e)
         })
@@ -644,82 +771,110 @@ def heartbeat():
 def heartbeat_check():
     """Enhanced background task to periodically check backend connectivity with focus on IBKR status"""
     while True:  # Always keep running, don't depend on connection_state["ibkr_connected"]
+        started = time.monotonic()
+        status_changed = False
         try:
-            result, error = send_backend_request("heartbeat", method="GET", timeout=5)
+            # Long-poll: a backend that supports ?wait holds the request until the IBKR
+            # state changes (or the wait expires); one that ignores it answers at once
+            result, error = send_backend_request(
+                "heartbeat",
+                method="GET",
+                timeout=(5, HEARTBEAT_LONG_POLL_WAIT + 5),  # (connect, read)
+                params={"wait": HEARTBEAT_LONG_POLL_WAIT}
+            )
             
             if not error and result:
-                # Update last backend heartbeat timestamp
-                connection_state["last_backend_heartbeat"] = datetime.now()
-                
                 # Check for IBKR status from backend response
                 # The backend should return 'connected_to_ibkr' in its response
                 ibkr_status = False
                 if "connected_to_ibkr" in result:
                     ibkr_status = result["connected_to_ibkr"]
                     
+                    # Keep /status and /heartbeat answering from cache between their own refreshes
+                    ibkr_status_cache["reachable"] = True
+                    ibkr_status_cache["value"] = ibkr_status
+                    ibkr_status_cache["ts"] = time.monotonic()
+                
+                with state_lock:
+                    # Update last backend heartbeat timestamp
+                    connection_state["last_backend_heartbeat"] = datetime.now()
+                    previous_status = connection_state["last_ibkr_status"]
+                    
                     # Only update the UI if the status has changed
-                    if connection_state["last_ibkr_status"] != ibkr_status:
-                        app.logger.info(f"IBKR connection status changed: {connection_state['last_ibkr_status']} -> {ibkr_status}")
+                    if "connected_to_ibkr" in result and previous_status != ibkr_status:
+                        status_changed = True
                         connection_state["ibkr_connected"] = ibkr_status
                         connection_state["last_ibkr_status"] = ibkr_status
-                        
-                        # Broadcast status change to all connected clients
-                        socketio.emit('connection_status', {
-                            "success": ibkr_status,
-                            "message": "Connected to IBKR" if ibkr_status else "Not Connected to IBKR",
-                            "reconnect_in_progress": connection_state["reconnect_in_progress"],
-                            "socket_connected": socket_state["connected"]
-                        })
+                    
+                    # IMPORTANT CHANGE: Only reset heartbeat failures if both backend and IBKR are connected
+                    if ibkr_status:
+                        connection_state["heartbeat_failures"] = 0
+                    else:
+                        # Increment failures if IBKR is disconnected
+                        connection_state["heartbeat_failures"] += 1
+                    state = dict(connection_state)
                 
-                # IMPORTANT CHANGE: Only reset heartbeat failures if both backend and IBKR are connected
-                if ibkr_status:
-                    connection_state["heartbeat_failures"] = 0
-                else:
-                    # Increment failures if IBKR is disconnected
+                if status_changed:
+                    app.logger.info(f"IBKR connection status changed: {previous_status} -> {ibkr_status}")
+                    
+                    # Broadcast status change to all connected clients
+                    emit_connection_status({
+                        "success": ibkr_status,
+                        "message": "Connected to IBKR" if ibkr_status else "Not Connected to IBKR",
+                        "reconnect_in_progress": state["reconnect_in_progress"],
+                        "socket_connected": socket_state["connected"]
+                    })
+                
+                if not ibkr_status:
                     app.logger.warning("Backend is reachable but IBKR is disconnected")
-                    connection_state["heartbeat_failures"] += 1
                 
                 socketio.emit('heartbeat', {
                     "status": "alive",
-                    "timestamp": connection_state["last_backend_heartbeat"].isoformat(),
+                    "timestamp": state["last_backend_heartbeat"].isoformat(),
                     "ibkr_connected": ibkr_status
                 })
             else:
-                connection_state["heartbeat_failures"] += 1
-                app.logger.warning(f"Heartbeat failure #{connection_state['heartbeat_failures']}: {error['error'] if error else 'Unknown error'}")
+                with state_lock:
+                    connection_state["heartbeat_failures"] += 1
+                    state = dict(connection_state)
+                app.logger.warning(f"Heartbeat failure #{state['heartbeat_failures']}: {error['error'] if error else 'Unknown error'}")
                 
                 socketio.emit('heartbeat', {
                     "status": "warning",
                     "error": error['error'] if error else "Unknown error",
-                    "consecutive_failures": connection_state["heartbeat_failures"],
+                    "consecutive_failures": state["heartbeat_failures"],
                     "max_failures": MAX_HEARTBEAT_FAILURES,
-                    "ibkr_connected": connection_state["ibkr_connected"]  # Keep previous status
+                    "ibkr_connected": state["ibkr_connected"]  # Keep previous status
                 })
             
             # Try to reconnect if either the backend is unreachable OR IBKR is disconnected
             # after multiple consecutive failures
-            if connection_state["heartbeat_failures"] >= MAX_HEARTBEAT_FAILURES and not connection_state["reconnect_in_progress"]:
+            if state["heartbeat_failures"] >= MAX_HEARTBEAT_FAILURES and not state["reconnect_in_progress"]:
                 app.logger.error(f"Maximum heartbeat failures reached ({MAX_HEARTBEAT_FAILURES}). Attempting verification...")
                 verify_and_reconnect()
             
         except Exception as e:
-            connection_state["heartbeat_failures"] += 1
+            with state_lock:
+                connection_state["heartbeat_failures"] += 1
+                state = dict(connection_state)
             app.logger.error(f"Heartbeat check exception: {str(e)}")
             
             socketio.emit('heartbeat', {
                 "status": "error",
                 "error": str(e),
-                "consecutive_failures": connection_state["heartbeat_failures"],
+                "consecutive_failures": state["heartbeat_failures"],
                 "max_failures": MAX_HEARTBEAT_FAILURES,
-                "ibkr_connected": connection_state["ibkr_connected"]  # Keep previous status
+                "ibkr_connected": state["ibkr_connected"]  # Keep previous status
             })
             
-            if connection_state["heartbeat_failures"] >= MAX_HEARTBEAT_FAILURES and not connection_state["reconnect_in_progress"]:
+            if state["heartbeat_failures"] >= MAX_HEARTBEAT_FAILURES and not state["reconnect_in_progress"]:
                 app.logger.error(f"Maximum heartbeat failures reached ({MAX_HEARTBEAT_FAILURES}). Attempting verification...")
                 verify_and_reconnect()
         
-        # Wait before next check - should be at least 30 seconds to avoid too frequent checks
-        socketio.sleep(30)
+        # Re-poll straight away after a state change; otherwise wait out the rest of the
+        # interval so a backend without long-poll support isn't hammered
+        if not status_changed:
+            socketio.sleep(max(0, HEARTBEAT_INTERVAL - (time.monotonic() - started)))
 
 def start_heartbeat_check():
     """Start the continuous heartbeat check without the reconnection logic"""
@@ -728,11 +883,12 @@ def start_heartbeat_check():
 def verify_and_reconnect():
     """Verify IBKR connection and attempt reconnection if needed"""
     # Only proceed if we're not already trying to reconnect
-    if connection_state["reconnect_in_progress"]:
-        return
-        
-    connection_state["reconnect_in_progress"] = True
-    socketio.emit('connection_status', {
+    with state_lock:
+        if connection_state["reconnect_in_progress"]:
+            return
+        connection_state["reconnect_in_progress"] = True
+    
+    emit_connection_status({
         "success": connection_state["ibkr_connected"],
         "message": "Verifying connection status...",
         "verifying": True,
@@ -759,17 +915,19 @@ def verify_and_reconnect():
                 ibkr_status = verify_result.get('connected', False)
                 
                 # Update our connection status
-                connection_state["ibkr_connected"] = ibkr_status
-                connection_state["last_ibkr_status"] = ibkr_status
+                with state_lock:
+                    connection_state["ibkr_connected"] = ibkr_status
+                    connection_state["last_ibkr_status"] = ibkr_status
+                    if ibkr_status:
+                        # We're actually still connected! Reset the heartbeat failure counter
+                        connection_state["heartbeat_failures"] = 0
+                        connection_state["last_backend_heartbeat"] = datetime.now()
+                        connection_state["reconnect_in_progress"] = False
                 
                 if ibkr_status:
-                    # We're actually still connected! Reset the heartbeat failure counter
                     app.logger.info("Connection verification successful - IBKR is connected!")
-                    connection_state["heartbeat_failures"] = 0
-                    connection_state["last_backend_heartbeat"] = datetime.now()
-                    connection_state["reconnect_in_progress"] = False
                     
-                    socketio.emit('connection_status', {
+                    emit_connection_status({
                         "success": True,
                         "message": "IBKR connection verified successfully",
                         "verified": True,
@@ -794,17 +952,17 @@ def verify_and_reconnect():
         try_reconnect()
     finally:
         # Make sure we reset the reconnect flag if something went wrong
-        if connection_state["reconnect_in_progress"]:
+        with state_lock:
             connection_state["reconnect_in_progress"] = False
 
 def try_reconnect():
     """Attempt to reconnect to backend using stored connection parameters"""
     # global last_connection_params
     
-    if not connection_state["reconnect_in_progress"]:
+    with state_lock:
         connection_state["reconnect_in_progress"] = True
     
-    socketio.emit('connection_status', {
+    emit_connection_status({
         "success": connection_state["ibkr_connected"],
         "message": "Connection lost or unstable. Attempting to reconnect...",
         "reconnecting": True,
@@ -829,8 +987,9 @@ def try_reconnect():
     params = load_params()
     if not params:
         app.logger.warning("Cannot auto-reconnect: no stored connection parameters in Redis")
-        connection_state["reconnect_in_progress"] = False
-        socketio.emit('connection_status', {
+        with state_lock:
+            connection_state["reconnect_in_progress"] = False
+        emit_connection_status({
             "success": False,
             "message": "Cannot auto-reconnect: no stored connection parameters",
             "reconnecting": False,
@@ -857,8 +1016,9 @@ def try_reconnect():
    
     if error:
         app.logger.error(f"Auto-reconnect failed: {error['error']}")
-        connection_state["reconnect_in_progress"] = False
-        socketio.emit('connection_status', {
+        with state_lock:
+            connection_state["reconnect_in_progress"] = False
+        emit_connection_status({
             "success": connection_state["ibkr_connected"],  # Keep previous status
             "message": f"Auto-reconnect failed: {error['error']}",
             "reconnecting": False,
@@ -866,13 +1026,14 @@ def try_reconnect():
         })
     elif result and result.get('success'):
         app.logger.info("Auto-reconnect successful!")
-        connection_state["ibkr_connected"] = True
-        connection_state["last_ibkr_status"] = True
-        connection_state["last_backend_heartbeat"] = datetime.now()
-        connection_state["heartbeat_failures"] = 0
-        connection_state["reconnect_in_progress"] = False
+        with state_lock:
+            connection_state["ibkr_connected"] = True
+            connection_state["last_ibkr_status"] = True
+            connection_state["last_backend_heartbeat"] = datetime.now()
+            connection_state["heartbeat_failures"] = 0
+            connection_state["reconnect_in_progress"] = False
         
-        socketio.emit('connection_status', {
+        emit_connection_status({
             "success": True,
             "message": "Auto-reconnect successful",
             "reconnected": True,
@@ -880,8 +1041,9 @@ def try_reconnect():
         })
     else:
         app.logger.warning(f"Auto-reconnect received unexpected response: {json.dumps(result)}")
-        connection_state["reconnect_in_progress"] = False
-        socketio.emit('connection_status', {
+        with state_lock:
+            connection_state["reconnect_in_progress"] = False
+        emit_connection_status({
             "success": connection_state["ibkr_connected"],  # Keep previous status
             "message": "Auto-reconnect failed with unexpected response from backend",
             "reconnecting": False,
@@ -904,6 +1066,7 @@ def socket_connect():
     socket_state["connected"] = True
     socket_state["last_connected"] = datetime.now()
     socket_state["clients"].add(request.sid)
+    join_room(DASHBOARD_ROOM)
     
     # Send initial connection state to newly connected clients: Skipping initial emit here to avoid sending stale “Not Connected”
     # emit('connection_status', {
@@ -938,7 +1101,7 @@ def force_reconnect():
         
     app.logger.info(f"Manual reconnect requested by client: {request.sid}")
     if not connection_state["reconnect_in_progress"]:
-        socketio.emit('connection_status', {
+        emit_connection_status({
             "success": connection_state["ibkr_connected"],
             "message": "Initiating reconnection...",
             "reconnecting": True,
@@ -964,26 +1127,27 @@ def backend_heartbeat():
         # Try to connect to backend with a short timeout
         result, error = send_backend_request("heartbeat", method="GET", timeout=5)
         if error:
-            return jsonify({
+            return json_response({
                 "status": "unreachable",
                 "error": error['error']
-            }), 503
-        return jsonify({
+            }, 503)
+        return json_response({
             "status": "reachable",
             "backend_response": result
         })
     except Exception as e:
         app.logger.error(f"Backend heartbeat check failed: {str(e)}")
-        return jsonify({
+        return json_response({
             "status": "error",
             "error": str(e)
-        }), 500
+        }, 500)
 
 @app.route('/reset_heartbeat_failures', methods=['POST'])
 @login_required
 def reset_heartbeat_failures():
     """Manually reset heartbeat failures counter"""
-    connection_state["heartbeat_failures"] = 0
+    with state_lock:
+        connection_state["heartbeat_failures"] = 0
     app.logger.info("Heartbeat failures counter manually reset")
     return jsonify({
         "success": True,
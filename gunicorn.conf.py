@@ -0,0 +1,25 @@
+import os
+
+# Gunicorn settings for the Socket.IO frontend (used by the Procfile)
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+
+# gevent-websocket worker so Socket.IO can upgrade to WebSocket; matches
+# monkey.patch_all() and async_mode='gevent' in app.py. An ASGI stack
+# (python-socketio ASGIApp + uvicorn/uvloop) was considered for cheaper
+# per-connection I/O, but it would mean rewriting the Flask routes, the
+# heartbeat task and every socketio.emit call as async. It would also still
+# use epoll rather than io_uring, so gevent stays.
+worker_class = 'geventwebsocket.gunicorn.workers.GeventWebSocketWorker'
+
+# Users, webhook tokens and connection state live in process memory and
+# Socket.IO needs sticky sessions, so run a single worker unless told otherwise
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+
+# Concurrent greenlets (Socket.IO clients, polls, webhooks) per worker
+worker_connections = int(os.environ.get('WORKER_CONNECTIONS', 2000))
+
+# Keep idle HTTP connections open between dashboard polls
+keepalive = 75
+
+timeout = 120